@@ -35,48 +35,54 @@ class RevIsNotParent(Exception):
 class ToolRuntimeError(RuntimeError):
     pass
 
-def git_checkout(rev):
-    curpath = os.getcwd()
-    os.chdir(REPO_PATH)
-    os.system('git checkout -q --force %s' % rev)
-    os.chdir(curpath)
+def git_checkout(repo, rev):
+    """ Check out the revision in the given repo.
+        The revision is resolved to a commit first and only its hash
+        is passed to git, so user input can't be taken as an option.
+    """
+    if not isinstance(rev, git.Commit):
+        rev = repo.commit(rev)
+    repo.git.checkout('-q', '--force', rev.hexsha)
 
-def git_range_to_revs(repo, git_range):
+def get_commit(repo, rev, cache=None):
+    """ Return the commit for rev. If a cache dict is given,
+        every rev string is resolved only once.
+    """
+    if cache is None:
+        return repo.commit(rev)
+    try:
+        return cache[rev]
+    except KeyError:
+        commit = repo.commit(rev)
+        cache[rev] = commit
+        return commit
+
+def git_range_to_revs(repo, git_range, cache=None):
     """ Get list of revisions for the specific range. """
     hashes=git_range.split('..')
 
-    revisions = list()
-    older = None
-    newer = None
-
     # find which git is the older one and which the newer one
-    a = repo.commit(hashes[0])
-    b = repo.commit(hashes[1])
-    if a.committed_date > b.committed_date:
+    a = get_commit(repo, hashes[0], cache)
+    b = get_commit(repo, hashes[1], cache)
+    bases = repo.merge_base(a, b)
+    if a in bases:
+        older = a
+        newer = b
+    elif b in bases:
         older = b
         newer = a
     else:
-        older = a
-        newer = b
-
-    revisions.append(newer)
-
-    parents = newer.iter_parents()
-    for p in parents:
-        revisions.append(p)
-
-        if p == older:
-            break
-
-    try:
-        next(parents)
-    except StopIteration:
         raise RevIsNotParent(
                 "Neither of the revisions %s and %s precedes the other one. "
                 "Are they in different branches?" %
                 (hashes[0], hashes[1]))
 
-    revisions = reversed(revisions)
+    # let git rev-list do the walk, oldest first;
+    # the range excludes the older end, so add it by hand
+    revisions = [older]
+    revisions += repo.iter_commits(
+            '%s..%s' % (older.hexsha, newer.hexsha),
+            reverse=True)
     return revisions
 
 def get_revisions(repo, rev_list):
@@ -85,11 +91,12 @@ def get_revisions(repo, rev_list):
         for-each over the output of this function.
     """
     revisions = list()
+    commits = dict()
     for i in rev_list:
-        if i.find('..') != -1:
-            revisions += git_range_to_revs(repo, i)
+        if '..' in i:
+            revisions.extend(git_range_to_revs(repo, i, commits))
         else:
-            revisions.append(repo.commit(i))
+            revisions.append(get_commit(repo, i, commits))
     return revisions
 
 def get_revisions_or_die(repo,rev_list):
@@ -113,7 +120,26 @@ def get_repo_or_die(args_path):
     if args_path:
         REPO_PATH = os.path.realpath(args_path)
     try:
-        return Repo(REPO_PATH)
+        repo = Repo(REPO_PATH)
     except git.exc.NoSuchPathError:
         print("Error: Path not a git repository: %s" % REPO_PATH)
         sys.exit(1)
+    write_commit_graph(repo)
+    return repo
+
+def write_commit_graph(repo):
+    """ Write the commit-graph file if the repo doesn't have one yet,
+        so git can answer ancestry queries without parsing the packs.
+        It is only an optimization, so any failure (e.g. a git
+        without commit-graph support) is ignored.
+    """
+    # objects are shared by all worktrees, so look in the common dir
+    # (git_dir of a linked worktree is .git/worktrees/<name>)
+    info = os.path.join(repo.common_dir, 'objects', 'info')
+    if os.path.exists(os.path.join(info, 'commit-graph')) or \
+            os.path.isdir(os.path.join(info, 'commit-graphs')):
+        return
+    try:
+        repo.git.commit_graph('write', '--reachable', '--changed-paths')
+    except git.exc.GitCommandError:
+        pass
@@ -21,10 +21,22 @@ import os
 import sys
 import re
 import argparse
-from git import repo
-import git
 from enum import Enum
 import json
+import pickle
+import hashlib
+import collections
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+try:
+    import ijson
+except ImportError:
+    ijson = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from lib import *
 
@@ -32,7 +44,26 @@ RES_PATH = os.path.join(
         os.path.realpath(os.path.dirname(__file__)),
         '../tex/results/output/')
 
+CACHE_PATH = os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.path.expanduser('~'), '.cache'),
+        'mmm-testrunner')
+
 CHECK_FOR_MKFS_ONLY = True
+USE_CACHE = True
+
+# The logs are plain ASCII, so the patterns are compiled just once
+# and without the Unicode matching rules.
+CPPCHECK_RE = re.compile(
+        r'^\[([^:]+)/([^:/]+):([0-9]+)\]: \(([^)]+)\) (.*)$',
+        re.ASCII)
+# Example of the line we are parsing:
+# copy/xfs_copy.c:144:40: warning: unused parameter 'log' [-Wunused-parameter]
+# The flag in brackets is optional.
+CLANG_RE = re.compile(
+        r'^([^/]+)/([^:]+):([0-9]+):([0-9]+): ([^:]+): (.+?)'
+        r'(?: \[([^][]+)\])?$',
+        re.ASCII)
 
 
 class Categories(Enum):
@@ -42,6 +73,10 @@ class Categories(Enum):
     SECURITY = 3
 
 class Issue(object):
+    # there can be a lot of issues, so don't give each one a __dict__
+    __slots__ = ('_file', '_line', '_category', '_text', '_index', '_hash',
+            '_cached_hash')
+
     def __init__(self, file, line, category, text, custom_hash=""):
         """
             custom_hash is for special cases like coverity, which has
@@ -57,8 +92,28 @@ class Issue(object):
         self._line = int(line)
         self._category = category
         self._text = text
-        self.index = 0
+        self._index = 0
         self._hash = custom_hash
+        self._cached_hash = None
+
+    def __getstate__(self):
+        # hash of a str differs between processes, so don't pickle it
+        return (self._file, self._line, self._category, self._text,
+                self._index, self._hash)
+
+    def __setstate__(self, state):
+        (self._file, self._line, self._category, self._text,
+                self._index, self._hash) = state
+        self._cached_hash = None
+
+    @property
+    def index(self):
+        return self._index
+
+    @index.setter
+    def index(self, index):
+        self._index = index
+        self._cached_hash = None
 
     @property
     def line(self):
@@ -82,27 +137,39 @@ class Issue(object):
 
     def extendText(self, text):
         self._text += "\n"+text
+        self._cached_hash = None
 
     def __eq__(self, issue):
         """ Return True if the given issue is the same,
             as this one. Line number can differ, because the offending
             piece of code could move between revisions.
+            Index tells apart issues with the same description
+            in the same file.
         """
-        if self.custom_hash and issue.custom_hash:
-            return self.custom_hash == issue.custom_hash
+        if self._index != issue._index:
+            return False
+        if self._hash or issue._hash:
+            return self._hash == issue._hash
         else:
-            return self.file == issue.file \
-                and self.category == issue.category \
-                and self.text == self.text
+            return self._file == issue._file \
+                and self._category == issue._category \
+                and self._text == issue._text
 
     def __hash__(self):
-        #return hash(self.__repr__())
-        return hash((
-                self.file,
-                self.category.name,
-                self.text,
-                self.index,
-                self._hash))
+        # has to use only what __eq__ compares; the fields don't change
+        # once the issue is stored, so compute it just once
+        h = self._cached_hash
+        if h is None:
+            if self._hash:
+                h = hash((self._hash, self._index))
+            else:
+                h = hash((
+                        self._file,
+                        self._category.value,
+                        self._text,
+                        self._index))
+            self._cached_hash = h
+        return h
 
 
     def __str__(self):
@@ -136,40 +203,127 @@ class Issue(object):
                     self.text)
 
 def print_issues(l):
-    count = 0
-    for i in l:
-        count += 1
-        print("%s\n" % str(i))
-    print("Total: %d\n"%count)
+    """ Print all issues and their count with a single write. """
+    out = ["%s\n\n" % str(i) for i in l]
+    out.append("Total: %d\n\n" % len(out))
+    sys.stdout.write(''.join(out))
 
 class Parser(object):
     """ A generic parser for all tools """
     _filename = None
-    _issues = None
 
-    lastIssue = None
+    # bump when a change in parsing makes the cached issues stale
+    VERSION = 3
 
     def __init__(self, resultsdir):
         """ resultsdir is the directory with all commits-dirs """
         self.resultsdir = resultsdir
         self.compile()
         self._issues = dict()
+        self._messages = dict()
+        self._revision = None
+        self._dup_counts = dict()
+        self._str_pool = dict()
+        self.lastIssue = None
+
+    def intern(self, string):
+        """ Return the first equal string this parser has seen,
+            so the same file names and texts of many issues share
+            one object and compare by identity first.
+        """
+        return self._str_pool.setdefault(string, string)
+
+    def report(self, message):
+        """ Save a message about the revision being parsed. It is printed
+            later together with the revision's issues, because parsing
+            can run in a worker process.
+        """
+        self._messages.setdefault(self._revision, []).append(message)
+
+    def get_messages(self, revision):
+        return self._messages.get(revision, [])
 
     def _get_path(self, revision):
         if self._filename is None:
             raise NotImplementedError()
         return os.path.join(self.resultsdir, revision, self._filename)
 
-    def _open_file(self, revision):
-        return open(self._get_path(revision), 'r')
+    def _open_file(self, path):
+        return open(path, 'r')
 
-    def read_lines(self, revision):
-        with self._open_file(revision) as f:
-            for line in f.readlines():
+    def read_lines(self, path):
+        """ Yield stripped lines of the log in path. The file is streamed,
+            so memory doesn't grow with the size of the log.
+        """
+        with self._open_file(path) as f:
+            for line in f:
                 yield line.strip()
 
+    def _cache_path(self, revision, path):
+        """ Each log and mkfs setting gets its own cache file, so runs
+            with different --respath, --clevel or -a don't overwrite
+            each other's entries.
+        """
+        config = hashlib.sha1(
+                ('%s\0%s' % (path, CHECK_FOR_MKFS_ONLY)).encode('utf-8'))
+        return os.path.join(CACHE_PATH, '%s-%s-%s.pickle' % (
+                type(self).__name__, revision, config.hexdigest()[:12]))
+
+    def _cache_key(self, path):
+        """ The cached issues are valid only as long as this key
+            doesn't change.
+        """
+        st = os.stat(path)
+        return (self.VERSION, path, st.st_mtime_ns, st.st_size,
+                CHECK_FOR_MKFS_ONLY)
+
+    def _load_cache(self, cache_path, key):
+        """ Return the cached set of issues, or None on a miss. """
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_key, issues, messages = pickle.load(f)
+        except Exception:
+            # a missing or broken cache file is just a miss
+            return None
+        if cached_key != key:
+            return None
+        return (issues, messages)
+
+    def _save_cache(self, cache_path, revision, key):
+        tmp = '%s.%d' % (cache_path, os.getpid())
+        issues = self._issues.get(revision, set())
+        messages = self.get_messages(revision)
+        try:
+            os.makedirs(CACHE_PATH, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                pickle.dump((key, issues, messages), f, protocol=5)
+            os.replace(tmp, cache_path)
+        except OSError as ex:
+            self.report("Can't save cache %s: %s" % (cache_path, str(ex)))
+
     def run(self, revision):
-        for line in self.read_lines(revision):
+        """ Parse the revision's results, unless the log didn't change
+            since the last time and we have its issues cached.
+        """
+        self._revision = revision
+        path = self._get_path(revision)
+        if not USE_CACHE:
+            self.parse_log(revision, path)
+            return
+
+        key = self._cache_key(path)
+        cache_path = self._cache_path(revision, path)
+        cached = self._load_cache(cache_path, key)
+        if cached is not None:
+            self._issues[revision], self._messages[revision] = cached
+            return
+
+        self.parse_log(revision, path)
+        self._save_cache(cache_path, revision, key)
+
+    def parse_log(self, revision, path):
+        """ Parse the log in path and add its issues to revision. """
+        for line in self.read_lines(path):
             issue = self.parse(line)
             if issue is None:
                 continue
@@ -180,9 +334,11 @@ class Parser(object):
             self._issues[revision] = set()
 
         # so we can have multiple issues with the same description
-        # in the same file
-        while issue in self._issues[revision]:
-            issue.index +=1
+        # in the same file, number them by how many we have seen already
+        counts = self._dup_counts.setdefault(revision, dict())
+        key = issue.custom_hash or (issue.file, issue.category, issue.text)
+        issue.index = counts.get(key, 0)
+        counts[key] = issue.index + 1
 
         self._issues[revision].add(issue)
         self.lastIssue = issue
@@ -206,11 +362,12 @@ class Parser(object):
             return None
 
     def get_diff(self, older, newer):
-        """ Return a tuple (added, removed) with lists of issues
-            changed between the two revisions.
+        """ Return a tuple (added, removed) with sets of issues
+            changed between the two revisions. The stored sets are
+            subtracted directly, nothing is copied.
         """
-        issuesO = set(self._issues[older])
-        issuesN = set(self._issues[newer])
+        issuesO = self._issues[older]
+        issuesN = self._issues[newer]
 
         added = issuesN-issuesO
         removed = issuesO - issuesN
@@ -244,7 +401,7 @@ class CppCheck(Parser):
     TEXT=5
 
     def compile(self):
-        self.re = re.compile('^\[([^:]+)/([^:/]+):([0-9]+)\]: \(([^)]+)\) (.*)$')
+        self.re = CPPCHECK_RE
 
     def get_category(self, string):
         if string == "style":
@@ -252,112 +409,161 @@ class CppCheck(Parser):
         else:
             return Categories.ERROR
 
+    def split(self, line):
+        """ Split an issue line into a tuple of the regex groups
+            (dir, file, line, category, text) with plain string
+            operations. Return None if the line has an unexpected shape.
+        """
+        loc, sep, rest = line[1:].partition(']: (')
+        if not sep:
+            return None
+        category, sep, text = rest.partition(') ')
+        if not sep or not category or ')' in category:
+            return None
+        path, sep, lineno = loc.rpartition(':')
+        if not sep or ':' in path or \
+                not (lineno.isascii() and lineno.isdigit()):
+            return None
+        directory, sep, filename = path.rpartition('/')
+        if not sep or not directory or not filename:
+            return None
+        return (directory, filename, lineno, category, text)
+
     def parse(self, line):
         """ CppCheck has a simple, single-line format of issues:
             [FILE:LINE]: (TYPE) text
         """
-        try:
-            if line[0] != '[':
-                # certainly it is not an issue
-                return None
+        if not line or line[0] != '[':
+            # certainly it is not an issue
+            return None
+        if CHECK_FOR_MKFS_ONLY and 'mkfs/' not in line:
+            # can't be in mkfs, skip it without splitting
+            return None
 
+        groups = self.split(line)
+        if groups is None:
+            # fall back to the regex for anything unusual
             matches = self.re.match(line)
-
-            if CHECK_FOR_MKFS_ONLY and matches.group(self.DIR)[-4:] != "mkfs":
+            if matches is None:
                 return None
+            groups = matches.groups()
+        directory, filename, lineno, category, text = groups
 
-            return Issue(
-                    file=matches.group(self.DIR)+matches.group(self.FILE),
-                    line=matches.group(self.LINE),
-                    category = self.get_category(matches.group(self.CATEGORY)),
-                    text = matches.group(self.TEXT))
-        except:
+        if CHECK_FOR_MKFS_ONLY and not directory.endswith("mkfs"):
             return None
 
-
+        return Issue(
+                file=self.intern(directory+filename),
+                line=lineno,
+                category = self.get_category(category),
+                text = self.intern(text))
+
+
+
+# categories of Clang/GCC warnings, by the flag that enabled them
+CLANG_FLAGS = {
+    # style
+    '-Wdiscarded-qualifiers': Categories.STYLE,
+    '-Wshadow': Categories.STYLE,
+    '-Wunused-parameter': Categories.STYLE,
+    '-Wpointer-arith': Categories.STYLE,
+    '-Wunused-but-set-variable': Categories.STYLE,
+    '-Wstrict-prototypes': Categories.STYLE,
+    '-Wempty-body': Categories.STYLE,
+    '-Wmissing-field-initializers': Categories.STYLE,
+    '-Wtype-limits': Categories.STYLE,
+    '-Wshift-negative-value': Categories.STYLE,
+    '-Wsign-compare': Categories.STYLE,
+    '-Wincompatible-pointer-types-discards-qualifiers': Categories.STYLE,
+    '-Wcast-align': Categories.STYLE,
+    '-Wformat-nonliteral': Categories.STYLE,
+    # errors
+    '-Wfloat-equal': Categories.ERROR,
+}
 
 class Clang(Parser):
     _filename = "Clang.log.cut"
-    _buffer = []
 
-    parsed = 0
+    DIR=1
+    FILE=2
+    LINE=3
+    COLUMN=4
+    TYPE=5
+    TEXT=6
+    FLAG=7
+
+    def __init__(self, resultsdir):
+        super().__init__(resultsdir)
+        # lines of the issue being read, per instance so that
+        # nothing leaks between tools or revisions
+        self._buffer = []
+        self.parsed = 0
+
     def compile(self):
-        """ Example of the line we are parsing:
-        copy/xfs_copy.c:144:40: warning: unused parameter 'log' [-Wunused-parameter]
-        The groups are defined.
+        self.re = CLANG_RE
+
+    def get_issue_type(self, flag, line):
+        """ Get category by the warning flag; line is only for
+            reporting unknown flags.
         """
-        self.re1 = re.compile('^([^/]+)/([^:]+):([0-9]+):([0-9]+): ([^:]+): (.+) \[([^][]+)\]$')
-        self.re2 = re.compile('^([^/]+)/([^:]+):([0-9]+):([0-9]+): ([^:]+): (.+)$')
-        self.DIR = 1
-        self.FILE = 2
-        self.LINE = 3
-        self.COLUMN = 4
-        self.TYPE = 5
-        self.TEXT = 6
-        self.FLAG = 7
-
-    def get_issue_type(self, line0, match):
-        #txt = line0[7:-1]
-        #if txt == "CLANG_WARNING" or txt == "COMPILER_WARNING":
-        try:
-            flag = match.group(self.FLAG)
-            ret = {
-                # style
-                '-Wdiscarded-qualifiers': Categories.STYLE,
-                '-Wshadow': Categories.STYLE,
-                '-Wunused-parameter': Categories.STYLE,
-                '-Wpointer-arith': Categories.STYLE,
-                '-Wunused-but-set-variable': Categories.STYLE,
-                '-Wstrict-prototypes': Categories.STYLE,
-                '-Wempty-body': Categories.STYLE,
-                '-Wmissing-field-initializers': Categories.STYLE,
-                '-Wtype-limits': Categories.STYLE,
-                '-Wshift-negative-value': Categories.STYLE,
-                '-Wsign-compare': Categories.STYLE,
-                '-Wincompatible-pointer-types-discards-qualifiers': Categories.STYLE,
-                '-Wcast-align': Categories.STYLE,
-                '-Wformat-nonliteral': Categories.STYLE,
-                # errors
-                '-Wfloat-equal': Categories.ERROR,
-                }
-            if flag in ret:
-                return ret[flag]
-            else:
-                print("Unknown type of issue:\n%s" % match.group(0))
-                return Categories.UNKNOWN
-        except IndexError:
+        if flag is None:
             # this is without flag
-            #print("No flag: %s" % match.group(self.TEXT))
-            pass
-        return Categories.UNKNOWN
+            return Categories.UNKNOWN
+        category = CLANG_FLAGS.get(flag)
+        if category is None:
+            self.report("Unknown type of issue:\n%s" % line)
+            return Categories.UNKNOWN
+        return category
+
+    @staticmethod
+    def is_diagnostic(line):
+        """ Cheap check whether CLANG_RE can match the line at all.
+            It needs 'DIR/FILE:LINE:COL: TYPE: text', so there have to be
+            at least two ': ' in the line, whatever the TYPE is.
+        """
+        first = line.find(': ')
+        return first != -1 and line.find(': ', first + 2) != -1
 
     def parse_buffer(self):
         # match can be on either line 1 or one of the following ones,
         # depending on if it is the first issue in a specific function or not
         # and depending on some includes.
 
-        line = 0
+        # The directory is the first part of the path, so if no line
+        # starts with mkfs, whatever matches is going to be skipped.
+        if CHECK_FOR_MKFS_ONLY and \
+                not any(l.startswith('mkfs/') for l in self._buffer[1:]):
+            return None
+
+        # A line with a flag wins, otherwise take the first one that
+        # matched at all.
         match = None
-        try:
-            while match is None:
-                line += 1
-                match = self.re1.match(self._buffer[line])
-        except IndexError:
+        for line in self._buffer[1:]:
+            m = self.re.match(line)
+            if m is None:
+                continue
+            if m.group(self.FLAG) is not None:
+                match = m
+                break
+            if match is None:
+                match = m
+
+        if match is None:
             # nothing was found until the end
-            line = 0
-            while match is None:
-                line += 1
-                match = self.re2.match(self._buffer[line])
+            return None
+
+        directory, filename, lineno, _, _, text, flag = match.groups()
 
         # do we want only mkfs files?
-        if CHECK_FOR_MKFS_ONLY and match.group(self.DIR) != "mkfs":
+        if CHECK_FOR_MKFS_ONLY and directory != "mkfs":
             return None
 
-        issue_type = self.get_issue_type(self._buffer[0], match)
-        return Issue(file=match.group(self.DIR)+'/'+match.group(self.FILE),
-                line=match.group(self.LINE),
+        issue_type = self.get_issue_type(flag, match.group(0))
+        return Issue(
+                file=self.intern(directory+'/'+filename),
+                line=lineno,
                 category=issue_type,
-                text=match.group(self.TEXT))
+                text=self.intern(text))
 
 
     def parse(self, line):
@@ -371,20 +577,18 @@ class Clang(Parser):
             return None
 
         if len(line):
-            # line is not empty, so it is still one issue,
-            # just add it to buffer
-            self._buffer.append(line)
+            # line is not empty, so it is still one issue, just add it
+            # to buffer - the first line of an issue always, the rest
+            # only if the regex in parse_buffer has a chance to match
+            if not self._buffer or self.is_diagnostic(line):
+                self._buffer.append(line)
             return None
 
         # the current line was empty, so we found the end of the issue
-        try:
-            issue = self.parse_buffer()
-            self._buffer = []
-            return issue
-        except IndexError:
-            # caused by multiple newlines in a row
-            self._buffer = []
-            return None
+        # (or there were multiple newlines in a row and it is empty)
+        issue = self.parse_buffer()
+        self._buffer.clear()
+        return issue
 
 class GCC(Clang):
     _filename = "GCC.log.cut"
@@ -442,34 +646,73 @@ class Coverity(Parser):
         return Categories.UNKNOWN
 
 
-    def run(self, revision):
+    @staticmethod
+    def find_main_event(events):
+        """ Return the main event of an issue, or None.
+            Events can have nested events of their own, so walk the tree
+            breadth-first with a worklist instead of recursion.
+        """
+        # almost always it is on the top level
+        main = next((e for e in events if e.get('main')), None)
+        if main is not None:
+            return main
+
+        queue = collections.deque(events)
+        while queue:
+            event = queue.popleft()
+            if event.get('main'):
+                return event
+            if event.get('events'):
+                queue.extend(event['events'])
+        return None
+
+    def parse_log(self, revision, path):
         """ Coverity produces JSON and because we don't need the regular line-by-line
-            parsing as for the other tools, implement custom run().
+            parsing as for the other tools, implement custom parse_log().
         """
-        issues = None
-        with open(self._get_path(revision)) as data_file:
-            data = json.load(data_file)
-            issues = data['issues']
-
-        i = 0
-        for issue in issues:
-            #self.parse_events_tree(revision, issue, issue['events'])
-            main = None
-            for event in issue['events']:
-                if event['main']:
-                    main = event
-                    # get the directory and file
-            d,f = main['filePathname'].split('/')[-2:]
-            if CHECK_FOR_MKFS_ONLY and d[-4:] != "mkfs":
-                continue
+        with open(path, 'rb') as data_file:
+            if ijson is None:
+                if orjson is None:
+                    data = json.load(data_file)
+                else:
+                    data = orjson.loads(data_file.read())
+                issues = data['issues']
+            else:
+                # stream the issues one by one instead of loading
+                # the whole (possibly huge) file at once
+                issues = ijson.items(data_file, 'issues.item')
+
+            for issue in issues:
+                main = self.find_main_event(issue['events'])
+                if main is None:
+                    continue
+                if CHECK_FOR_MKFS_ONLY and \
+                        'mkfs/' not in main['filePathname']:
+                    continue
+                # get the directory and file
+                d,f = main['filePathname'].rsplit('/', 2)[-2:]
+                if CHECK_FOR_MKFS_ONLY and d[-4:] != "mkfs":
+                    continue
+
+                self.add_issue(revision, Issue(
+                    file = self.intern(os.path.join(d,f)),
+                    line = main['lineNumber'],
+                    category = self.get_type(issue),
+                    text = self.intern(main['eventDescription']),
+                    custom_hash = issue['mergeKey'],
+                ))
 
-            self.add_issue(revision, Issue(
-                file = os.path.join(d,f),
-                line = main['lineNumber'],
-                category = self.get_type(issue),
-                text = main['eventDescription'],
-                custom_hash = issue['mergeKey'],
-            ))
+
+def parse_revision(tool_cls, resultsdir, revision):
+    """ Parse results of one revision with a fresh tool_cls parser
+        and return a tuple (revision, set of issues, list of messages).
+        It is a plain function so it can run in a worker process,
+        which is also why it doesn't print anything itself.
+    """
+    tool = tool_cls(resultsdir)
+    tool.run(revision)
+    return (revision, tool._issues.get(revision, set()),
+            tool.get_messages(revision))
 
 
 # ------------------------------------------------
@@ -497,6 +740,9 @@ parser.add_argument('-d', '--diff', action='store_true',
                 help='Print only the differences between two following revisions.')
 parser.add_argument('-a', '--all', action='store_true',
                 help='Do not check only for mkfs, but for whole xfsprogs.')
+parser.add_argument('--no-cache', action='store_true',
+                help='Parse all results again instead of using issues '
+                     'cached in %s.' % CACHE_PATH)
 
 args = parser.parse_args()
 repo = None
@@ -505,6 +751,9 @@ revisions = None
 if args.all:
     CHECK_FOR_MKFS_ONLY = False
 
+if args.no_cache:
+    USE_CACHE = False
+
 if args.clevel:
     try:
         Coverity.level(args.clevel)
@@ -525,32 +774,43 @@ if args.tool:
 
 repo = get_repo_or_die(args.gitpath)
 revisions = get_revisions_or_die(repo, args.revisions)
+shorts = [r.hexsha[:10] for r in revisions]
 
 if args.respath:
     RES_PATH = args.respath
 
 # run the parsers
-for tool_cls in tools:
-    print("### Tool %s" % tool_cls.__name__)
-    tool = tool_cls(RES_PATH)
-
-    for i,revision in enumerate(revisions):
-        short = str(revision)[0:10]
-        print("## Revision %s:\n" % short)
-        tool.run(short)
-
-        diff = args.diff
-        if i == 0:
-            diff = False
-
-        if diff:
-            added, removed = tool.get_diff(
-                str(revisions[i-1])[0:10],
-                short)
-            print("# Added:")
-            print_issues(added)
-            print("# Removed:")
-            print_issues(removed)
-        else:
-            # we don't want or can't print a diff
-            print_issues(tool.get_all_issues(short))
+# Revisions are parsed in parallel, one process per CPU. Fork the workers,
+# so they see the same options (mkfs only, Coverity level) as we do.
+with ProcessPoolExecutor(
+        mp_context=multiprocessing.get_context('fork')) as pool:
+    for tool_cls in tools:
+        print("### Tool %s" % tool_cls.__name__)
+        tool = tool_cls(RES_PATH)
+
+        # one tool at a time, so only its issues are held in memory
+        # and its errors show up before other tools are started
+        for short, issues, messages in pool.map(
+                functools.partial(parse_revision, tool_cls, RES_PATH),
+                shorts):
+            tool._issues[short] = issues
+            tool._messages[short] = messages
+
+        for i,short in enumerate(shorts):
+            print("## Revision %s:\n" % short)
+            for message in tool.get_messages(short):
+                print(message)
+
+            diff = args.diff
+            if i == 0:
+                diff = False
+
+            if diff:
+                added, removed = tool.get_diff(shorts[i-1], short)
+                print("# Added:")
+                print_issues(added)
+                print("# Removed:")
+                print_issues(removed)
+            else:
+                # we don't want or can't print a diff
+                print_issues(tool.get_all_issues(short))
@@ -28,6 +28,7 @@ import time
 from lib import *
 
 LIVE = False
+READ_SIZE = 64 * 1024
 OUTPUT = os.path.realpath(os.path.join(PATH, 'output'))
 
 
@@ -40,8 +41,9 @@ def save_lines(subdir, tag, lines):
         os.mkdir(path)
 
     with open(target, 'w') as f:
-        for line in lines:
-            f.write("%s\n" % line)
+        if lines:
+            f.write('\n'.join(lines))
+            f.write('\n')
 
 
 class Tool(object):
@@ -58,17 +60,33 @@ class Tool(object):
         self._cmd = os.path.join(self._containerPath, 'run.sh')
 
     def run(self, rev):
-        os.chdir(self._containerPath)
         output = []
         start = time.time()
         try:
             p = subprocess.Popen(
                     [self._cmd, REPO_PATH],
+                    cwd=self._containerPath,
                     stdout = subprocess.PIPE,
                     stderr=subprocess.PIPE)
 
-            for line in iter(p.stdout.readline, b''):
-                line = line.decode('utf-8').replace('\n','')
+            # read whatever is available in big chunks and decode all
+            # complete lines at once; keep the unfinished one for later
+            carry = b''
+            while True:
+                chunk = p.stdout.read1(READ_SIZE)
+                if not chunk:
+                    break
+                data = carry + chunk
+                cut = data.rfind(b'\n') + 1
+                carry = data[cut:]
+                if not cut:
+                    continue
+                lines = data[:cut-1].decode('utf-8').split('\n')
+                if LIVE:
+                    print('\n'.join(lines))
+                output.extend(lines)
+            if carry:
+                line = carry.decode('utf-8')
                 if LIVE:
                     print(line)
                 output.append(line)
@@ -118,7 +136,7 @@ class Coverity(Tool):
         path = os.path.join(OUTPUT, rev)
         target = os.path.join(path, "cov.output")
 
-        shutil.move('cov', target)
+        shutil.move(os.path.join(self._containerPath, 'cov'), target)
 
 class Clang(Tool):
     _name = "Clang"
@@ -190,13 +208,13 @@ except Exception as e:
 
 # run the tests
 for revision in revisions:
-    print("git checkout %s" % str(revision)[0:10])
-    #repo.head.reference = revision
-    git_checkout(revision)
+    short = revision.hexsha[:10]
+    print("git checkout %s" % short)
+    git_checkout(repo, revision)
     for tool in tools:
         print("Running %s..." % tool.name)
         try:
-            tool.run(str(revision)[0:10])
+            tool.run(short)
         except ToolRuntimeError as e:
             print('Tool %s eded with an error: %s' %(tool.name, e))
 